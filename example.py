@@ -1,40 +1,54 @@
-from __future__ import print_function, division
-
+import logging
 import time
 import sys
 import random
 from pprint import pprint
 from tournament import Participant, SwissTournament, SingleEliminationTournament
 
+log = logging.getLogger(__name__)
+
 
 def on_start(tournament):
-    print("Starting up an {} player tournament".format(tournament.num_players))
+    log.info(f"Starting up an {tournament.num_players} player tournament")
 
 
 def on_round_complete(tournament):
-    print("\n===================")
-    print("Round {} Standings".format(tournament.current_round))
-    print("===================")
-    pprint(list(enumerate(tournament.get_players_by_rank())))
+    if log.isEnabledFor(logging.INFO):
+        log.info("\n===================")
+        log.info(f"Round {tournament.current_round} Standings")
+        log.info("===================")
+        pprint(list(enumerate(tournament.get_players_by_rank())))
 
 
 def on_match_ready(tournament, match):
-    print("Starting match {} vs. {}".format(match.home, match.away))
+    log.info(f"Starting match {match.home} vs. {match.away}")
 
 
 def on_match_complete(tournament, match):
-    print("Finishing match {} vs {}. Winner: {}".format(match.home, match.away, match.winner))
+    log.info(f"Finishing match {match.home} vs {match.away}. Winner: {match.winner}")
 
 
 def on_complete(tournament):
-    print("\n===================")
-    print("Final Standings")
-    print("===================")
-    pprint(list(enumerate(tournament.get_players_by_rank())))
+    if log.isEnabledFor(logging.INFO):
+        log.info("\n===================")
+        log.info("Final Standings")
+        log.info("===================")
+        pprint(list(enumerate(tournament.get_players_by_rank())))
     sys.exit()
 
 
+def run_one(tournament):
+    match = next(iter(tournament._active_matches))
+    match.report_result(random.choice([match.home, match.away]))
+
+
 if __name__ == '__main__':
+    simulate = '--simulate' in sys.argv
+    if simulate:
+        sys.argv.remove('--simulate')
+    # Keep the simulate path free of I/O entirely
+    logging.basicConfig(level=logging.WARNING if simulate else logging.INFO,
+                        format='%(message)s')
     participants = [Participant(i) for i in range(1, int(sys.argv[2]) + 1)]
     random.shuffle(participants)
 
@@ -51,7 +65,11 @@ if __name__ == '__main__':
     example.add_callback('on_round_complete', on_round_complete)
     example.start()
 
-    while True:
-        time.sleep(random.random() * 2)
-        match = random.choice(example.active_matches)
-        match.report_result(random.choice([match.home, match.away]))
+    if simulate:
+        # Drain the tournament as fast as results can be processed
+        while example._active_matches:
+            run_one(example)
+    else:
+        while True:
+            time.sleep(random.random() * 2)
+            run_one(example)
@@ -1,22 +1,49 @@
-import uuid
-import math
-from collections import deque
+from collections import defaultdict
+from itertools import combinations, count
+from operator import attrgetter
+
+try:
+    import networkx
+except ImportError:
+    networkx = None
+
+try:
+    from sortedcontainers import SortedKeyList
+except ImportError:
+    SortedKeyList = None
+
+
+def _standings_key(player):
+    return -player.tournament_score
 
 
 class Participant(object):
+    #: Subclass and flip this on to record every match a player is
+    #: assigned to in match_history; off by default since nothing in the
+    #: core reads it and it costs an append per bracket transition.
+    TRACK_HISTORY = False
+
+    __slots__ = ('id', 'current_match', 'match_history', 'tournament_score', 'score', 'seat_index')
+
     def __init__(self, pid):
         self.id = pid
         self.current_match = None
         self.match_history = list()
         self.tournament_score = 0
+        #: Dense 0..n-1 index assigned by the tournament at seeding time
+        self.seat_index = None
 
     def set_current_match(self, match):
         self.current_match = match
-        self.match_history.append(match)
+        if self.TRACK_HISTORY:
+            self.match_history.append(match)
 
     def __eq__(self, other):
         return isinstance(other, Participant) and self.id == other.id
 
+    def __hash__(self):
+        return hash(self.id)
+
     def __repr__(self):
         return str(self)
 
@@ -26,18 +53,27 @@ class Participant(object):
 
 BY = Participant("BY")
 
+#: Matches only ever need a process-local identity, so a counter is
+#: plenty and avoids an os.urandom read per match.
+_match_ids = count()
+
 
 class Match(object):
     TIE = 1
 
+    __slots__ = ('uuid', 'tournament', 'home', 'away', 'winner', 'loser', 'state', 'index')
+
     def __init__(self, tournament, home=None, away=None):
-        self.uuid = uuid.uuid4()
+        self.uuid = next(_match_ids)
         self.tournament = tournament
         self.home = home
         self.away = away
         self.winner = None
+        self.loser = None
         #: One of WAITING, PENDING, STARTED, COMPLETED, etc
         self.state = None
+        #: Position in the tournament's match list, assigned by the tournament
+        self.index = None
 
     @property
     def active(self):
@@ -60,6 +96,9 @@ class Match(object):
             self.loser = self.home
         self.tournament.handle_match_result(self)
 
+    def __hash__(self):
+        return hash(self.uuid)
+
     def __repr__(self):
         return str(self)
 
@@ -69,13 +108,20 @@ class Match(object):
 
 class CallbackMixin(object):
     def __init__(self):
-        self._callbacks = dict()
+        self._callbacks = defaultdict(list)
+        self._has_events = False
 
     def add_callback(self, event, handler):
-        self._callbacks.setdefault(event, []).append(handler)
+        self._callbacks[event].append(handler)
+        self._has_events = True
 
     def trigger_event(self, event, *args, **kwargs):
-        for handler in self._callbacks.get(event, []):
+        if not self._has_events:
+            return
+        handlers = self._callbacks.get(event)
+        if not handlers:
+            return
+        for handler in handlers:
             handler(self, *args, **kwargs)
 
 
@@ -85,6 +131,7 @@ class Tournament(CallbackMixin):
             on_start(tournament) - triggers when tournament is started
             on_complete(tournament) - triggers when all matches are completed
             on_match_ready(tournament, match) - triggers when match players are determined
+            on_matches_ready(tournament, matches) - triggers once per batch of new matches
             on_match_complete(tournament, match) - triggers when match results are reported
     """
     def __init__(self, max_size=None, participants=None):
@@ -93,17 +140,32 @@ class Tournament(CallbackMixin):
         self.participants = participants
         if participants is None:
             self.participants = list()
+        self._ranked_cache = list()
+        self._rank_dirty = True
+        self._standings = None
+        self._active_matches = set()
+        self._completed_matches = set()
 
     def start(self):
         self.num_players = len(self.participants)
         self.order_players_by_initial_rank()
         for player in self.participants:
             player.tournament_score = 0
+        self._rank_dirty = True
+        if SortedKeyList is not None:
+            self._standings = SortedKeyList(self.participants, key=_standings_key)
 
         self.trigger_event('on_start')
         self.seed_players()
 
+    def _register_match(self, match):
+        """ Tracks a newly created match so the active/completed sets stay current. """
+        if match.active:
+            self._active_matches.add(match)
+
     def handle_match_result(self, match):
+        self._active_matches.discard(match)
+        self._completed_matches.add(match)
         self.calc_match_points(match)
         self.trigger_event('on_match_complete', match)
         self.process_match_result(match)
@@ -113,24 +175,43 @@ class Tournament(CallbackMixin):
             attribute based on the match results.
         """
         if match.winner == match.TIE:
-            match.home.tournament_score += 1
-            match.away.tournament_score += 1
+            self._add_score(match.home, 1)
+            self._add_score(match.away, 1)
         else:
-            match.winner.tournament_score += 3
-            match.loser.tournament_score += 0
+            self._add_score(match.winner, 3)
+            self._add_score(match.loser, 0)
+        self._rank_dirty = True
+
+    def _add_score(self, player, delta):
+        """ Adjusts a player's tournament_score, keeping the incremental
+            standings consistent when they are in use.
+        """
+        if delta == 0:
+            return
+        if self._standings is not None:
+            self._standings.remove(player)
+            player.tournament_score += delta
+            self._standings.add(player)
+        else:
+            player.tournament_score += delta
 
     def get_players_by_rank(self):
         """ Orders players by their current tournament results
         """
-        return sorted(self.participants, key=lambda p: p.tournament_score, reverse=True)
+        if self._standings is not None:
+            return list(self._standings)
+        if self._rank_dirty:
+            self._ranked_cache = sorted(self.participants, key=attrgetter('tournament_score'), reverse=True)
+            self._rank_dirty = False
+        return self._ranked_cache
 
     @property
     def active_matches(self):
-        return filter(lambda m: m.active, self.matches)
+        return list(self._active_matches)
 
     @property
     def completed_matches(self):
-        return filter(lambda m: m.is_complete, self.matches)
+        return list(self._completed_matches)
 
     def seed_players(self):
         """ This function seeds the players into the tournament right when it starts.
@@ -154,45 +235,122 @@ class Tournament(CallbackMixin):
         raise NotImplementedError()
 
 
+def _pair_round(order, played):
+    """ Greedy Swiss pairing over seat indices: each player gets the
+        highest ranked opponent they have not yet played, or the highest
+        ranked player left when everyone nearby has been met.
+
+        order holds the seat index of each player from best to worst rank
+        and played the per-seat opponent bitmasks; the result is a list of
+        (i, j) positions into order. The function is pure integer work
+        with no Participant objects so a compiled implementation can be
+        swapped in without touching the tournament classes.
+    """
+    n = len(order)
+    pairs = []
+    paired = [False] * n
+    for i in range(n):
+        if paired[i]:
+            continue
+        mask = played[order[i]]
+        away_index = None
+        for j in range(i + 1, n):
+            if not paired[j] and not mask >> order[j] & 1:
+                away_index = j
+                break
+        else:
+            for j in range(i + 1, n):
+                if not paired[j]:
+                    away_index = j
+                    break
+        paired[i] = paired[away_index] = True
+        pairs.append((i, away_index))
+    return pairs
+
+
 class SwissTournament(Tournament):
     def __init__(self, rounds, max_size=None, participants=None):
         super(SwissTournament, self).__init__(max_size, participants)
         self.current_round = 0
         self.rounds = rounds
-        self.opponents = dict()
+        #: One bitmask per seat; bit b of mask a is set once seats a and b
+        #: have played each other
+        self._played = list()
+        self._round_buf = list()
+        self._pending_this_round = 0
 
     def seed_players(self):
+        for seat, player in enumerate(self.participants):
+            player.seat_index = seat
+        self._played = [0] * len(self.participants)
+        self._round_buf = [None] * len(self.participants)
         self.matches_per_round = len(self.participants) // 2
         self.setup_round()
 
+    def _has_played(self, home, away):
+        return self._played[home.seat_index] >> away.seat_index & 1
+
+    #: Weight penalty that makes the blossom matching avoid rematches
+    #: unless no rematch-free perfect matching exists
+    REPEAT_PENALTY = 10 ** 6
+
+    def _greedy_pairs(self, ranked):
+        """ Thin wrapper around the index-only _pair_round: materialize
+            the seat order, pair, and translate back to Participants.
+        """
+        order = [player.seat_index for player in ranked]
+        return [(ranked[i], ranked[j]) for i, j in _pair_round(order, self._played)]
+
+    def _blossom_pairs(self, ranked):
+        """ Pairs players with Edmonds' blossom maximum-weight matching,
+            minimizing score differences and penalizing rematches across
+            the whole round at once rather than greedily per player.
+        """
+        graph = networkx.Graph()
+        scores = [player.tournament_score for player in ranked]
+        for i, j in combinations(range(len(ranked)), 2):
+            weight = -abs(scores[i] - scores[j])
+            if self._has_played(ranked[i], ranked[j]):
+                weight -= self.REPEAT_PENALTY
+            graph.add_edge(i, j, weight=weight)
+        matching = networkx.max_weight_matching(graph, maxcardinality=True)
+        return [(ranked[min(i, j)], ranked[max(i, j)]) for i, j in matching]
+
     def setup_round(self):
         self.current_round += 1
-        players = deque(self.get_players_by_rank())
-        while players:
-            # Players should play the highest ranked person that
-            # they have not yet played (if possible).
-            home = players.popleft()
-            for player in players:
-                if player not in self.opponents.setdefault(home, []):
-                    away = player
-                    players.remove(away)
-                    break
-            else:
-                away = players.popleft()
-
+        # Refill the reusable buffer instead of binding a fresh ranking
+        # list every round
+        if self._standings is not None:
+            self._round_buf[:] = self._standings
+        else:
+            self._round_buf[:] = self.get_players_by_rank()
+        ranked = self._round_buf
+        if networkx is not None:
+            pairs = self._blossom_pairs(ranked)
+        else:
+            pairs = self._greedy_pairs(ranked)
+        ready_batch = []
+        base = len(self.matches)
+        self.matches.extend([None] * len(pairs))
+        for offset, (home, away) in enumerate(pairs):
             match = Match(self, home=home, away=away)
+            self._register_match(match)
             home.set_current_match(match)
             away.set_current_match(match)
-            self.opponents.setdefault(home, []).append(away)
-            self.opponents.setdefault(away, []).append(home)
-            self.matches.append(match)
+            self._played[home.seat_index] |= 1 << away.seat_index
+            self._played[away.seat_index] |= 1 << home.seat_index
+            self.matches[base + offset] = match
+            ready_batch.append(match)
             self.trigger_event('on_match_ready', match)
+        self._pending_this_round = self.matches_per_round
+        self.trigger_event('on_matches_ready', ready_batch)
         self.trigger_event('on_start_round')
 
     def is_round_complete(self):
-        return len(filter(lambda m: not m.is_complete, self.matches)) == 0
+        return self._pending_this_round == 0
 
     def process_match_result(self, match):
+        self._pending_this_round -= 1
         if self.is_round_complete():
             if self.current_round != self.rounds:
                 self.setup_round()
@@ -203,66 +361,106 @@ class SwissTournament(Tournament):
 
 
 class SingleEliminationTournament(Tournament):
-    def __init__(self, max_size=None, participants=None):
-        super(SingleEliminationTournament, self).__init__(max_size, participants)
-        self.bracket = dict()
-        self.sources = dict()
+    """ Matches live in self.matches as a flat complete binary tree: the
+        field_size/2 first-round matches come first, each later round
+        follows contiguously, and the finals sit at index field_size - 2.
+        The winner of match i feeds the home slot of match
+        field_size/2 + i/2 when i is even and the away slot when i is odd.
+    """
+
+    @staticmethod
+    def _seed_order(rounds):
+        """ Returns the snake-seed permutation for a 2**rounds field.
+
+            Seeds 0 and 1 land in opposite halves of the bracket (they can
+            only meet in the finals), seeds 2 and 3 in opposite quarters,
+            and so on down the tree.
+        """
+        order = [0]
+        for r in range(rounds):
+            top = (1 << (r + 1)) - 1
+            order = [s for seed in order for s in (seed, top - seed)]
+        return order
 
     def seed_players(self):
-        self.rounds = int(math.ceil(math.log(self.num_players, 2)))
-        self.field_size = 2 ** self.rounds
-
-        # All initial matches are seeded by the players and bys
-        match_queue = deque()
-        player_queue = deque(self.participants)
-        player_queue.extend([BY] * (self.field_size - self.num_players))
-        while player_queue:
-            # The 'best' players get the bys and play the 'worst' ones
-            home = player_queue.popleft()
-            away = player_queue.pop()
+        self.rounds = max(1, (self.num_players - 1).bit_length())
+        self.field_size = 1 << self.rounds
+
+        # All initial matches are seeded by the players and bys;
+        # the 'best' players get the bys and play the 'worst' ones
+        entrants = list(self.participants)
+        entrants.extend([BY] * (self.field_size - self.num_players))
+        seed_order = self._seed_order(self.rounds)
+        ready_batch = []
+        self.matches = [None] * (self.field_size - 1)
+        for slot in range(0, self.field_size, 2):
+            home = entrants[seed_order[slot]]
+            away = entrants[seed_order[slot + 1]]
             home.score = 0
             away.score = 0
             match = Match(self, home=home, away=away)
+            match.index = slot // 2
+            self._register_match(match)
             home.set_current_match(match)
             away.set_current_match(match)
-            match_queue.append(match)
+            self.matches[match.index] = match
+            ready_batch.append(match)
             self.trigger_event('on_match_ready', match)
+        self.trigger_event('on_matches_ready', ready_batch)
 
-        # All future matches go into our bracket so we know
-        # how to process match results
-        while len(match_queue) > 1:
-            top = match_queue.popleft()
-            bot = match_queue.popleft()
+        # All future matches start empty; their position in the flat
+        # array is all we need to route winners forward
+        for index in range(self.field_size // 2, self.field_size - 1):
             match = Match(self)
-            self.bracket[top] = match
-            self.bracket[bot] = match
-            self.sources[match] = (top, bot)
-            match_queue.append(match)
-            self.matches.append(top)
-            self.matches.append(bot)
-
-        # Don't forget the finals!
-        self.matches.append(match_queue.pop())
+            match.index = index
+            self._register_match(match)
+            self.matches[index] = match
 
         # Do all the necessary BY matches automatically
         # This works because matches are ordered by round already
-        for match in self.matches:
+        for match in self.matches[:self.field_size // 2]:
             if match.away == BY:
-                match.report_result(match.home)
+                self._auto_advance(match, match.home)
+
+    def _auto_advance(self, match, winner):
+        """ Resolves a by match directly: no points are scored and no
+            match-complete events fire, the winner just moves up the
+            bracket.
+        """
+        match.winner = winner
+        match.loser = BY
+        self._active_matches.discard(match)
+        self._completed_matches.add(match)
+
+        if match.index == self.field_size - 2:
+            # A walkover finals; only possible with a single entrant
+            self.trigger_event('on_complete')
+            return
+
+        winner_match = self.matches[self.field_size // 2 + match.index // 2]
+        winner.set_current_match(winner_match)
+        if match.index & 1:
+            winner_match.away = winner
+        else:
+            winner_match.home = winner
+
+        if winner_match.active:
+            self._active_matches.add(winner_match)
+            self.trigger_event('on_match_ready', winner_match)
 
     def process_match_result(self, match):
-        if match not in self.bracket:
+        if match.index == self.field_size - 2:
             # This is the end of the line for these players
             self.trigger_event('on_complete')
             return
 
-        winner_match = self.bracket[match]
+        winner_match = self.matches[self.field_size // 2 + match.index // 2]
         match.winner.set_current_match(winner_match)
-        home_source, away_source = self.sources[winner_match]
-        if match == home_source:
-            winner_match.home = match.winner
-        else:
+        if match.index & 1:
             winner_match.away = match.winner
+        else:
+            winner_match.home = match.winner
 
         if winner_match.active:
+            self._active_matches.add(winner_match)
             self.trigger_event('on_match_ready', winner_match)